@@ -23,6 +23,7 @@
 # SOFTWARE.
 """Jumping Tasks."""
 
+from gym_jumping_task.envs.batched_jumping_task import BatchedJumpTaskEnv
 from gym_jumping_task.envs.jumping_colors_task import COLORS
 from gym_jumping_task.envs.jumping_colors_task import JumpTaskEnvWithColors
 from gym_jumping_task.envs.jumping_coordinates_task import JumpTaskEnvWithCoordinates
@@ -0,0 +1,69 @@
+# coding=utf-8
+# MIT License
+#
+# Copyright 2021 Google LLC
+# Copyright (c) 2018 Maluuba Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Compiles the drawing kernels of the envs ahead of time with numba.pycc.
+
+Without it, the kernels are compiled by numba.njit the first time an env is
+created, which takes a few seconds in every process that cannot use numba's
+on-disk cache. Run once, after installing numba and this package:
+
+  python -m gym_jumping_task.envs._build_rasterizer
+
+to build the `_jumping_native` extension next to this file. The envs then use
+it, and numba is no longer needed at runtime.
+"""
+
+import os
+
+from gym_jumping_task.envs import batched_jumping_task
+from gym_jumping_task.envs import jumping_task
+from numba.pycc import CC
+
+RECT = 'UniTuple(i8, 4)'
+
+# pylint: disable=protected-access
+EXPORTS = [
+    ('move_rect', 'void(u1[:, :], u1[:, :], u1[:, :], {0}, {0})'.format(RECT),
+     jumping_task._move_rect_greyscale),
+    ('draw_scenes',
+     'void(u1[:, :, :], u1[:, :, :], u1[:, :, :], b1[:], i4[:], i4[:], i8, i8)',
+     batched_jumping_task._draw_scenes),
+    ('move_rects',
+     'void(u1[:, :, :], u1[:, :, :], u1[:, :, :], i4[:, :], i4[:, :])',
+     batched_jumping_task._move_rects),
+]
+# pylint: enable=protected-access
+
+
+def main():
+  cc = CC('_jumping_native')
+  cc.output_dir = os.path.dirname(os.path.abspath(__file__))
+  for name, signature, kernel in EXPORTS:
+    # The kernels are numba dispatchers, export the Python functions they wrap
+    cc.export(name, signature)(kernel.py_func)
+  cc.compile()
+
+
+if __name__ == '__main__':
+  main()
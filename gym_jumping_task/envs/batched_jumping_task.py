@@ -0,0 +1,252 @@
+# coding=utf-8
+# MIT License
+#
+# Copyright 2021 Google LLC
+# Copyright (c) 2018 Maluuba Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Batch of jumping tasks stepped together with vectorized numpy operations."""
+
+import gym
+from gym import spaces
+from gym.utils import seeding
+from gym_jumping_task.envs import jumping_task
+import numpy as np
+
+GREYSCALE_WHITE = jumping_task.GREYSCALE_WHITE
+GREYSCALE_GREY = jumping_task.GREYSCALE_GREY
+JUMP_HEIGHT = jumping_task.JUMP_HEIGHT
+JUMP_VERTICAL_SPEED = jumping_task.JUMP_VERTICAL_SPEED
+JUMP_HORIZONTAL_SPEED = jumping_task.JUMP_HORIZONTAL_SPEED
+ALLOWED_OBSTACLE_X = np.array(jumping_task.ALLOWED_OBSTACLE_X, dtype=np.int32)
+ALLOWED_OBSTACLE_Y = np.array(jumping_task.ALLOWED_OBSTACLE_Y, dtype=np.int32)
+
+
+@jumping_task._jit  # pylint: disable=protected-access
+def _draw_scenes(obs, background, foreground, reset, obstacle_position,
+                 floor_height, obstacle_w, obstacle_h):
+  """Draws the static part of the screen of the envs selected by reset."""
+  scr_h, scr_w = obs.shape[1], obs.shape[2]
+  for i in range(obs.shape[0]):
+    if not reset[i]:
+      continue
+    # Array to array copies are slow in numba, so the scene is drawn in each
+    # observation buffer rather than copied from the background.
+    obs[i] = 0
+    background[i] = 0
+    foreground[i] = GREYSCALE_WHITE
+    left, bottom = obstacle_position[i], floor_height[i]
+    for screen in (obs[i], background[i], foreground[i]):
+      screen[bottom:bottom + obstacle_h, left:left + obstacle_w] = GREYSCALE_GREY
+      screen[::scr_h - 1] = GREYSCALE_WHITE
+      screen[:, ::scr_w - 1] = GREYSCALE_WHITE
+      screen[bottom] = GREYSCALE_WHITE
+
+
+@jumping_task._jit  # pylint: disable=protected-access
+def _move_rects(obs, background, foreground, old_rects, new_rects):
+  """Moves the agent of each env from its old to its new rectangle in obs.
+  Rectangles are given as (top, bottom, left, right) indices of the screen.
+  """
+  for i in range(obs.shape[0]):
+    top, bottom, left, right = old_rects[i]
+    new_top, new_bottom, new_left, new_right = new_rects[i]
+    if (top == new_top and bottom == new_bottom and left == new_left
+        and right == new_right):
+      continue
+    obs[i, top:bottom, left:right] = background[i, top:bottom, left:right]
+    obs[i, new_top:new_bottom, new_left:new_right] = foreground[
+        i, new_top:new_bottom, new_left:new_right]
+
+
+class BatchedJumpTaskEnv(gym.vector.VectorEnv):
+  """Batch of greyscale jumping tasks with the default options of JumpTaskEnv.
+
+  The state of all the envs is stored in arrays of shape (num_envs,) and
+  updated with vectorized numpy operations rather than a Python loop over the
+  envs. As in gym's SyncVectorEnv, an env is reset as soon as it is done and
+  the observation returned for it is the first one of its next episode, while
+  its last observation is returned in the info dict.
+  """
+
+  def __init__(self,
+               num_envs,
+               seed=42,
+               scr_w=60,
+               scr_h=60,
+               agent_w=5,
+               agent_h=10,
+               agent_init_pos=0,
+               agent_speed=1,
+               obstacle_size=(9, 10),
+               max_number_of_steps=600):
+    """Batch of environments for the jumping task.
+
+    Args:
+      num_envs: number of environments in the batch
+      seed: seed used in the random selection of the obstacle positions
+      scr_w: screen width, by default 60 pixels
+      scr_h: screen height, by default 60 pixels
+      agent_w: agent width, by default 5 pixels
+      agent_h: agent height, by default 10 pixels
+      agent_init_pos: initial x position of the agents (on the floor),
+        defaults to the left of the screen
+      agent_speed: agent lateral speed, measured in pixels per time step,
+        by default 1 pixel
+      obstacle_size: width and height of the obstacles, by default (9, 10)
+      max_number_of_steps: the maximum number of steps for an episode, by
+        default 600.
+    """
+    self.seed(seed)
+
+    self.rewards = {'life': -1, 'exit': 100}
+    self.scr_w = scr_w
+    self.scr_h = scr_h
+    self.state_shape = [scr_h, scr_w]
+    self.legal_actions = [0, 1]
+    self.agent_speed = agent_speed
+    self.agent_init_pos = agent_init_pos
+    self.agent_size = [agent_w, agent_h]
+    self.obstacle_size = obstacle_size
+    self.agent_w, self.agent_h = agent_w, agent_h
+    self.obstacle_w, self.obstacle_h = obstacle_size
+    self.max_number_of_steps = max_number_of_steps
+
+    super().__init__(
+        num_envs,
+        spaces.Box(low=0, high=255, shape=self.state_shape, dtype=np.uint8),
+        spaces.Discrete(len(self.legal_actions)))
+
+    # State of the envs
+    self.agent_pos_x = np.zeros(num_envs, dtype=np.int32)
+    self.agent_pos_y = np.zeros(num_envs, dtype=np.int32)
+    self.jumping_up = np.zeros(num_envs, dtype=bool)
+    self.jumping_down = np.zeros(num_envs, dtype=bool)
+    self.obstacle_position = np.zeros(num_envs, dtype=np.int32)
+    self.floor_height = np.zeros(num_envs, dtype=np.int32)
+    self.step_id = np.zeros(num_envs, dtype=np.int32)
+
+    # Observation buffers, see JumpTaskEnv
+    obs_shape = [num_envs] + self.state_shape
+    self._obs_buffer = np.zeros(obs_shape, dtype=np.uint8)
+    self._obs_background = np.zeros_like(self._obs_buffer)
+    self._obs_foreground = np.zeros_like(self._obs_buffer)
+    self._agent_rects = np.zeros((num_envs, 4), dtype=np.int32)
+    # pylint: disable=protected-access
+    self._draw_scenes = getattr(
+        jumping_task._jumping_native, 'draw_scenes', _draw_scenes)
+    self._move_rects = getattr(
+        jumping_task._jumping_native, 'move_rects', _move_rects)
+    # pylint: enable=protected-access
+
+  def seed(self, seed=None):
+    """Seed used in the random selection of the obstacle positions
+    """
+    self.np_random, seed = seeding.np_random(seed)
+    return [seed]
+
+  def _reset_envs(self, reset):
+    """Resets the envs selected by the boolean array reset.
+    Sets their obstacle at one of six random positions.
+    """
+    n = np.count_nonzero(reset)
+    self.obstacle_position[reset] = ALLOWED_OBSTACLE_X[
+        self.np_random.integers(len(ALLOWED_OBSTACLE_X), size=n)]
+    self.floor_height[reset] = ALLOWED_OBSTACLE_Y[
+        self.np_random.integers(len(ALLOWED_OBSTACLE_Y), size=n)]
+    self.agent_pos_x[reset] = self.agent_init_pos
+    self.agent_pos_y[reset] = self.floor_height[reset]
+    self.jumping_up[reset] = False
+    self.jumping_down[reset] = False
+    self.step_id[reset] = 0
+    self._draw_scenes(self._obs_buffer, self._obs_background,
+                      self._obs_foreground, reset, self.obstacle_position,
+                      self.floor_height, self.obstacle_w, self.obstacle_h)
+    self._agent_rects[reset] = 0
+
+  def get_state(self):
+    """Returns an np array of the screens in greyscale, as uint8 in [0, 255]
+    """
+    rects = np.stack([self.agent_pos_y, self.agent_pos_y + self.agent_h,
+                      self.agent_pos_x, self.agent_pos_x + self.agent_w], axis=1)
+    self._move_rects(self._obs_buffer, self._obs_background,
+                     self._obs_foreground, self._agent_rects, rects)
+    self._agent_rects = rects
+    return self._obs_buffer.copy()
+
+  def reset(self):
+    """Resets all the games.
+    """
+    self._reset_envs(np.ones(self.num_envs, dtype=bool))
+    return self.get_state()
+
+  def step(self, actions):
+    """Updates the games based on the actions selected, one per env.
+    Returns the states, the rewards, the terminal flags and an info dict with:
+      'collision': flags the envs where the agent hit the obstacle
+      'timeout': flags the envs done because of max_number_of_steps
+      'terminal_observation': only when some env is done, the states before the
+        done envs are reset, whose rows for the done envs are the last states
+        of their episodes
+
+    Args
+      actions: array of shape (num_envs,), the actions taken by the agents
+    """
+    actions = np.asarray(actions)
+    if not np.all((actions == 0) | (actions == 1)):
+      raise ValueError(
+          'We did not recognize that action. '
+          'It should be an int in {}'.format(self.legal_actions))
+    old_x = self.agent_pos_x.copy()
+    active = self.step_id <= self.max_number_of_steps
+
+    # Agents in the air keep jumping whatever the action
+    start_jump = active & ~self.jumping_up & ~self.jumping_down & (actions == 1)
+    self.jumping_up |= start_jump
+    jumping = self.jumping_up | self.jumping_down
+    moves = active & (jumping | (actions == 0))
+    self.agent_pos_x += moves * (self.agent_speed * JUMP_HORIZONTAL_SPEED)
+    falling = active & self.jumping_up & (
+        self.agent_pos_y > self.floor_height + JUMP_HEIGHT)
+    self.jumping_up &= ~falling
+    self.jumping_down |= falling
+    dy = self.agent_speed * JUMP_VERTICAL_SPEED
+    self.agent_pos_y += np.where(active & self.jumping_up, dy, 0)
+    self.agent_pos_y -= np.where(active & self.jumping_down, dy, 0)
+    self.jumping_down &= self.agent_pos_y != self.floor_height
+
+    killed = active & (
+        (self.obstacle_position + self.obstacle_w > self.agent_pos_x)
+        & (self.obstacle_position < self.agent_pos_x + self.agent_w)
+        & (self.floor_height + self.obstacle_h > self.agent_pos_y)
+        & (self.floor_height < self.agent_pos_y + self.agent_h))
+    exited = active & (self.scr_w < self.agent_pos_x + self.agent_w)
+    dones = ~active | killed | exited
+
+    rewards = self.agent_pos_x - old_x
+    rewards[exited] += self.rewards['exit']
+    rewards[killed] = self.rewards['life']
+    self.step_id += 1
+
+    infos = {'collision': killed, 'timeout': ~active}
+    if dones.any():
+      infos['terminal_observation'] = self.get_state()
+      self._reset_envs(dones)
+    return self.get_state(), rewards, dones, infos
@@ -0,0 +1,189 @@
+# coding=utf-8
+# MIT License
+#
+# Copyright 2021 Google LLC
+# Copyright (c) 2018 Maluuba Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Jumping task as pure JAX functions, to be vmapped and jitted.
+
+The game has the default options of JumpTaskEnv (greyscale screen, no left
+action, single obstacle) and JAX needs to be installed to import this module.
+A batch of games is stepped with, e.g.:
+
+  key, *reset_keys = jax.random.split(key, num_envs + 1)
+  states, obs = jax.vmap(reset)(jnp.array(reset_keys))
+  # At each step, with fresh keys for the games that end
+  key, *step_keys = jax.random.split(key, num_envs + 1)
+  states, obs, rewards, dones = jax.vmap(auto_reset_step)(
+      states, actions, jnp.array(step_keys))
+
+or, over a sequence of actions, with jax.vmap(rollout), which splits the keys.
+"""
+
+from typing import NamedTuple
+
+from gym_jumping_task.envs import jumping_task
+import jax
+import jax.numpy as jnp
+
+SCR_W = 60
+SCR_H = 60
+AGENT_W = 5
+AGENT_H = 10
+AGENT_INIT_POS = 0
+AGENT_SPEED = 1
+OBSTACLE_W = 9
+OBSTACLE_H = 10
+MAX_NUMBER_OF_STEPS = 600
+REWARDS = {'life': -1, 'exit': 100}
+
+# Phases of the jump
+ON_FLOOR = 0
+JUMPING_UP = 1
+JUMPING_DOWN = 2
+
+
+class State(NamedTuple):
+  """State of a game, all int32 scalars (or arrays once vmapped)."""
+  agent_x: jnp.ndarray
+  agent_y: jnp.ndarray
+  jump_phase: jnp.ndarray
+  obstacle_x: jnp.ndarray
+  floor_height: jnp.ndarray
+  step_id: jnp.ndarray
+
+
+def get_state(state):
+  """Returns the screen of the game in greyscale, as uint8 in [0, 255].
+  Same as JumpTaskEnv.get_state, drawn with masks since the positions are
+  traced values.
+  """
+  rows = jnp.arange(SCR_H)[:, None]
+  cols = jnp.arange(SCR_W)[None, :]
+
+  def _rect(left, bottom, width, height):
+    return ((rows >= bottom) & (rows < bottom + height)
+            & (cols >= left) & (cols < left + width))
+
+  agent = _rect(state.agent_x, state.agent_y, AGENT_W, AGENT_H)
+  obstacle = _rect(state.obstacle_x, state.floor_height, OBSTACLE_W, OBSTACLE_H)
+  lines = ((rows == 0) | (rows == SCR_H - 1) | (cols == 0) | (cols == SCR_W - 1)
+           | (rows == state.floor_height))
+  # The floor and the outline are drawn over the obstacle, itself drawn over
+  # the agent.
+  obs = jnp.where(agent, jumping_task.GREYSCALE_WHITE, 0)
+  obs = jnp.where(obstacle, jumping_task.GREYSCALE_GREY, obs)
+  obs = jnp.where(lines, jumping_task.GREYSCALE_WHITE, obs)
+  return obs.astype(jnp.uint8)
+
+
+@jax.jit
+def reset(key):
+  """Starts a new game with the obstacle at one of six random positions.
+  Returns the state of the game and its screen.
+  """
+  key_x, key_y = jax.random.split(key)
+  floor_height = jax.random.choice(
+      key_y, jnp.array(jumping_task.ALLOWED_OBSTACLE_Y, dtype=jnp.int32))
+  state = State(
+      agent_x=jnp.int32(AGENT_INIT_POS),
+      agent_y=floor_height,
+      jump_phase=jnp.int32(ON_FLOOR),
+      obstacle_x=jax.random.choice(
+          key_x, jnp.array(jumping_task.ALLOWED_OBSTACLE_X, dtype=jnp.int32)),
+      floor_height=floor_height,
+      step_id=jnp.int32(0))
+  return state, get_state(state)
+
+
+@jax.jit
+def step(state, action):
+  """Updates the game based on the action selected, as JumpTaskEnv.step.
+  Returns the new state, its screen, the reward and whether it is terminal.
+
+  Args
+    state: the state of the game
+    action: 0 to go right, 1 to jump
+  """
+  active = state.step_id <= MAX_NUMBER_OF_STEPS
+  jump_phase = jnp.where(
+      active & (state.jump_phase == ON_FLOOR) & (action == 1),
+      JUMPING_UP, state.jump_phase)
+  # Agents in the air keep jumping whatever the action
+  moves = active & ((jump_phase != ON_FLOOR) | (action == 0))
+  agent_x = state.agent_x + jnp.where(
+      moves, AGENT_SPEED * jumping_task.JUMP_HORIZONTAL_SPEED, 0)
+  falling = active & (jump_phase == JUMPING_UP) & (
+      state.agent_y > state.floor_height + jumping_task.JUMP_HEIGHT)
+  jump_phase = jnp.where(falling, JUMPING_DOWN, jump_phase)
+  dy = AGENT_SPEED * jumping_task.JUMP_VERTICAL_SPEED
+  agent_y = (state.agent_y
+             + jnp.where(active & (jump_phase == JUMPING_UP), dy, 0)
+             - jnp.where(active & (jump_phase == JUMPING_DOWN), dy, 0))
+  jump_phase = jnp.where(
+      (jump_phase == JUMPING_DOWN) & (agent_y == state.floor_height),
+      ON_FLOOR, jump_phase)
+
+  killed = active & (
+      (state.obstacle_x + OBSTACLE_W > agent_x)
+      & (state.obstacle_x < agent_x + AGENT_W)
+      & (state.floor_height + OBSTACLE_H > agent_y)
+      & (state.floor_height < agent_y + AGENT_H))
+  exited = active & (SCR_W < agent_x + AGENT_W)
+  done = ~active | killed | exited
+  reward = agent_x - state.agent_x + jnp.where(exited, REWARDS['exit'], 0)
+  reward = jnp.where(killed, REWARDS['life'], reward)
+
+  state = state._replace(
+      agent_x=agent_x.astype(jnp.int32),
+      agent_y=agent_y.astype(jnp.int32),
+      jump_phase=jump_phase.astype(jnp.int32),
+      step_id=state.step_id + 1)
+  return state, get_state(state), reward.astype(jnp.int32), done
+
+
+@jax.jit
+def auto_reset_step(state, action, key):
+  """Same as step, but starts a new game using key when the game is done.
+  The returned state and screen are then the first ones of the new game.
+  The key must be a fresh one at every call: reusing a key starts every new
+  game with the same obstacle position and floor height.
+  """
+  state, obs, reward, done = step(state, action)
+  reset_state, reset_obs = reset(key)
+  state = jax.tree_util.tree_map(
+      lambda new, old: jnp.where(done, new, old), reset_state, state)
+  return state, jnp.where(done, reset_obs, obs), reward, done
+
+
+@jax.jit
+def rollout(state, actions, key):
+  """Plays a sequence of actions with auto_reset_step.
+  Returns the final state and the screens, rewards and terminal flags stacked
+  along the first axis.
+  """
+  def _step(state, inputs):
+    action, key = inputs
+    state, obs, reward, done = auto_reset_step(state, action, key)
+    return state, (obs, reward, done)
+
+  keys = jax.random.split(key, actions.shape[0])
+  return jax.lax.scan(_step, state, (actions, keys))
@@ -28,9 +28,7 @@ import enum
 from gym_jumping_task.envs import jumping_task
 import numpy as np
 
-RGB_WHITE = 1.0
-OBSTACLE_1 = jumping_task.OBSTACLE_1
-OBSTACLE_2 = jumping_task.OBSTACLE_2
+RGB_GREY = 128
 
 
 class COLORS(enum.Enum):
@@ -43,6 +41,8 @@ class JumpTaskEnvWithColors(jumping_task.JumpTaskEnv):
 
   def __init__(self, obstacle_color=COLORS.GREEN, **kwargs):
     self._obstacle_color = obstacle_color
+    self._obstacle_rgb = np.zeros(3, dtype=np.uint8)
+    self._obstacle_rgb[obstacle_color.value] = RGB_GREY
     super().__init__(**kwargs, use_colors=True)
     if self._obstacle_color == COLORS.GREEN:
       # Reward provided on colliding with the obstacle when obstacle is green
@@ -55,42 +55,16 @@ class JumpTaskEnvWithColors(jumping_task.JumpTaskEnv):
     self._already_collided = False
     return super()._reset(*args, **kwargs)
 
-  def get_state(self):
-    """Returns an np array of the screen in RGB."""
-    obs = np.zeros((self.scr_h, self.scr_w, 3), dtype=np.float32)
+  def _rect(self, left, bottom, width, height):
+    # The RGB screen has the floor at the bottom: the pixels at height y are
+    # shown on row scr_h - 1 - y.
+    return (max(self.scr_h - bottom - height, 0), max(self.scr_h - bottom, 0),
+            left, left + width)
 
-    def _fill_rec(left, up, size, color):
-      obs[left: left + size[0], up: up + size[1], :] = color
-
-    def _fill_obstacle(left, up, size):
-      right, down = left + size[0], up + size[1]
-      for channel in range(3):
-        if channel == self._obstacle_color.value:
-          obs[left:right, up:down, channel] = 0.5
-        else:
-          obs[left:right, up:down, channel] = 0.0
-
-    # Add agent and obstacles
-    _fill_rec(
-        self.agent_pos_x, self.agent_pos_y, self.agent_size, RGB_WHITE)
-    if self.two_obstacles:
-      # Multiple obstacles
-      _fill_obstacle(OBSTACLE_1, self.floor_height, self.obstacle_size)
-      _fill_obstacle(OBSTACLE_2, self.floor_height, self.obstacle_size)
-    else:
-      _fill_obstacle(self.obstacle_position, self.floor_height,
-                     self.obstacle_size)
-
-    # Draw the outline of the screen
-    obs[0:self.scr_w, 0, :] = RGB_WHITE
-    obs[0:self.scr_w, self.scr_h-1, :] = RGB_WHITE
-    obs[0, 0:self.scr_h, :] = RGB_WHITE
-    obs[self.scr_w-1, 0:self.scr_h, :] = RGB_WHITE
-
-    # Draw the floor
-    obs[0:self.scr_w, self.floor_height, :] = RGB_WHITE
-
-    return np.transpose(obs, axes=[1, 0, 2])[::-1]
+  def _fill_obstacle(self, obs, left):
+    top, bottom, left, right = self._rect(
+        left, self.floor_height, self.obstacle_w, self.obstacle_h)
+    obs[top:bottom, left:right] = self._obstacle_rgb
 
   def _game_status(self):
     collided, success = super()._game_status()
@@ -102,8 +76,8 @@ class JumpTaskEnvWithColors(jumping_task.JumpTaskEnv):
     self._already_collided = self._already_collided or collided
     return collided, success
 
-  def step(self, action):
-    state, reward, done, info = super().step(action)
+  def step(self, action, return_obs=True):
+    state, reward, done, info = super().step(action, return_obs=return_obs)
     if (self.agent_pos_y == self.floor_height) and info['collision']:
       reward += self.rewards['collision']
     return state, reward, done, info
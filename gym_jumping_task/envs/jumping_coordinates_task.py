@@ -26,7 +26,6 @@
 
 from __future__ import absolute_import
 from __future__ import division
-from __future__ import google_type_annotations
 from __future__ import print_function
 
 from gym import spaces
@@ -42,13 +41,13 @@ class JumpTaskEnvWithCoordinates(jumping_task.JumpTaskEnv):
 
   def __init__(self, *args, **kwargs):
     super(JumpTaskEnvWithCoordinates, self).__init__(*args, **kwargs)
-    low = np.array([1.0 - RIGHT, 0.0])
-    high = np.array([56.0 - LEFT, 16.0])
+    low = np.array([1.0 - RIGHT, 0.0], dtype=np.float32)
+    high = np.array([56.0 - LEFT, 16.0], dtype=np.float32)
 
-    self.state_shape = (3,)
+    self.state_shape = (2,)
     self.observation_space = spaces.Box(low=low, high=high, dtype=np.float32)
 
   def get_state(self):
     coordinates = [self.agent_pos_x - self.obstacle_position,
                    self.agent_pos_y - self.floor_height]
-    return np.array(coordinates)
+    return np.array(coordinates, dtype=np.float32)
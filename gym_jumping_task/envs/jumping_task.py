@@ -33,14 +33,25 @@ from gym.utils import seeding
 import numpy as np
 import time
 
+try:
+  import numba
+except ImportError:
+  numba = None
+
+try:
+  # Kernels compiled ahead of time by _build_rasterizer.py
+  from gym_jumping_task.envs import _jumping_native
+except ImportError:
+  _jumping_native = None
+
 
 ################## COLORS #####################
 # Colors of the different objects on the screen
 RGB_WHITE = (255, 255, 255)
 RGB_GREY = (128, 128, 128)
 RGB_BLACK = (0, 0, 0)
-GREYSCALE_WHITE = 1.0
-GREYSCALE_GREY = 0.5
+GREYSCALE_WHITE = 255
+GREYSCALE_GREY = 128
 ###############################################
 
 
@@ -71,6 +82,36 @@ DOWN = 0
 UP = 41
 ###############################################
 
+
+def _jit(fn):
+  """Compiles fn with numba when it is installed, otherwise leaves it as is."""
+  if numba is None:
+    return fn
+  return numba.njit(cache=True)(fn)
+
+
+def _move_rect(obs, background, foreground, old_rect, new_rect):
+  """Moves a rectangle of foreground pixels to a new position in obs.
+  Rectangles are given as (top, bottom, left, right) indices of the screen.
+  """
+  top, bottom, left, right = old_rect
+  obs[top:bottom, left:right] = background[top:bottom, left:right]
+  top, bottom, left, right = new_rect
+  obs[top:bottom, left:right] = foreground[top:bottom, left:right]
+
+
+# Compiling only pays off on greyscale screens: on RGB ones, numba is not
+# faster than numpy on these small 3-D slices.
+_move_rect_greyscale = _jit(_move_rect)
+
+
+def _overlapping(ax, ay, aw, ah, bx, by, bw, bh):
+  """Whether the rectangles at (ax, ay) of size (aw, ah) and at (bx, by) of size
+  (bw, bh) overlap.
+  """
+  return bx + bw > ax and bx < ax + aw and by + bh > ay and by < ay + ah
+
+
 class JumpTaskEnv(gym.Env):
 
   def __init__(self,
@@ -129,9 +170,9 @@ class JumpTaskEnv(gym.Env):
     self.scr_w = scr_w
     self.scr_h = scr_h
     if use_colors:
-      self.state_shape = [scr_w, scr_h, 3]
+      self.state_shape = [scr_h, scr_w, 3]
     else:
-      self.state_shape = [scr_w, scr_h]
+      self.state_shape = [scr_h, scr_w]
 
     self.rendering = rendering
     self.zoom = zoom
@@ -150,6 +191,14 @@ class JumpTaskEnv(gym.Env):
     self.agent_init_pos = agent_init_pos
     self.agent_size = [agent_w, agent_h]
     self.obstacle_size = obstacle_size
+    self.agent_w, self.agent_h = agent_w, agent_h
+    self.obstacle_w, self.obstacle_h = obstacle_size
+    if rendering:
+      # Drawn at each frame, the obstacles being moved at each reset
+      self._agent_screen_rect = pygame.Rect(0, 0, zoom*agent_w, zoom*agent_h)
+      self._obstacle_surf = pygame.Surface(
+          (zoom*self.obstacle_w, zoom*self.obstacle_h))
+      self._obstacle_surf.fill(RGB_GREY)
     self.step_id = 0
     self.slow_motion = slow_motion
     self.max_number_of_steps = max_number_of_steps
@@ -162,42 +211,61 @@ class JumpTaskEnv(gym.Env):
     self.max_y_position = UP
 
     # Define gym env objects
-    self.observation_space = spaces.Box(low=0, high=1, shape=(self.state_shape))
+    self.observation_space = spaces.Box(
+        low=0, high=255, shape=tuple(self.state_shape), dtype=np.uint8)
     self.action_space = spaces.Discrete(self.nb_actions)
 
+    # Observation buffers, reused across steps. The background holds the
+    # static part of the screen (obstacles, outline and floor), the foreground
+    # is the same screen as seen through the agent.
+    self._obs_buffer = np.zeros(self.state_shape, dtype=np.uint8)
+    self._obs_background = np.zeros_like(self._obs_buffer)
+    self._obs_foreground = np.zeros_like(self._obs_buffer)
+    if use_colors:
+      self._move_rect = _move_rect
+    else:
+      self._move_rect = getattr(
+          _jumping_native, 'move_rect', _move_rect_greyscale)
+
     self.reset()
 
   def _game_status(self):
     """Returns two booleans stating whether the agent is touching the obstacle(s) (failure)
     and whether the agent has reached the right end of the screen (success).
+    Once the game is over, returns the status that ended it.
     """
-    def _overlapping_objects(env, sx, sy):
-      return sx + env.obstacle_size[0] > env.agent_pos_x and sx < env.agent_pos_x + env.agent_size[0] \
-          and sy + env.obstacle_size[1] > env.agent_pos_y and sy < env.agent_pos_y + env.agent_size[1]
-
+    if self.done:
+      return self._status
+    ax, ay = self.agent_pos_x, self.agent_pos_y
+    aw, ah = self.agent_w, self.agent_h
+    ow, oh = self.obstacle_w, self.obstacle_h
     if self.two_obstacles:
-      failure = _overlapping_objects(self, OBSTACLE_1, self.floor_height) or \
-          _overlapping_objects(self, OBSTACLE_2, self.floor_height)
+      failure = (_overlapping(ax, ay, aw, ah, OBSTACLE_1, self.floor_height, ow, oh) or
+                 _overlapping(ax, ay, aw, ah, OBSTACLE_2, self.floor_height, ow, oh))
     else:
-      failure = _overlapping_objects(
-          self, self.obstacle_position, self.floor_height)
+      failure = _overlapping(
+          ax, ay, aw, ah, self.obstacle_position, self.floor_height, ow, oh)
 
-    success = self.scr_w < self.agent_pos_x + self.agent_size[0]
+    success = self.scr_w < ax + aw
 
     self.done = bool(failure or success)
+    self._status = bool(failure), bool(success)
+    return self._status
 
+  def _render_step(self):
+    """Renders the screen after each discrete step, including those of a
+    finished jump, when rendering is on.
+    """
     if self.rendering:
       self.render()
       if self.slow_motion:
         time.sleep(0.1)
 
-    return failure, success
-
   def _continue_jump(self):
     """Updates the position of the agent while jumping.
     Needs to be called at each discrete step of the jump
     """
-    self.agent_pos_x = np.max([self.agent_pos_x + self.agent_current_speed, 0])
+    self.agent_pos_x = max(self.agent_pos_x + self.agent_current_speed, 0)
     if self.agent_pos_y > self.floor_height + JUMP_HEIGHT:
       self.jumping[1] = "down"
     if self.jumping[1] == "up":
@@ -207,16 +275,25 @@ class JumpTaskEnv(gym.Env):
       if self.agent_pos_y == self.floor_height:
         self.jumping[0] = False
 
-  def reset(self, ):
+  def reset(self, return_obs=True):
     """Resets the game.
     To be called at the beginning of each episode for training as in the paper.
     Sets the obstacle at one of six random positions.
-    """
-    obstacle_position = self.np_random.choice(ALLOWED_OBSTACLE_X)
-    floor_height = self.np_random.choice(ALLOWED_OBSTACLE_Y)
-    return self._reset(obstacle_position, floor_height)
 
-  def _reset(self, obstacle_position=30, floor_height=10, two_obstacles=False):
+    Args:
+      return_obs: if False, the state is not computed and None is returned in
+        its place, by default True
+    """
+    # Indexing the lists directly is much cheaper than np_random.choice, which
+    # converts them to arrays, and draws the same positions.
+    obstacle_position = ALLOWED_OBSTACLE_X[
+        self.np_random.integers(len(ALLOWED_OBSTACLE_X))]
+    floor_height = ALLOWED_OBSTACLE_Y[
+        self.np_random.integers(len(ALLOWED_OBSTACLE_Y))]
+    return self._reset(obstacle_position, floor_height, return_obs=return_obs)
+
+  def _reset(self, obstacle_position=30, floor_height=10, two_obstacles=False,
+             return_obs=True):
     """Resets the game.
     Allows to set different obstacle positions and floor heights
 
@@ -224,24 +301,32 @@ class JumpTaskEnv(gym.Env):
       obstacle_position: the x position of the obstacle for the new game
       floor_height: the floor height for the new game
       two_obstacles: whether to switch to a two obstacles environment
+      return_obs: if False, the state is not computed and None is returned in
+        its place, by default True
     """
+    # Plain ints keep the positions, rewards and flags Python scalars.
+    obstacle_position, floor_height = int(obstacle_position), int(floor_height)
     self.agent_pos_x = self.agent_init_pos
     self.agent_pos_y = floor_height
     self.agent_current_speed = self.agent_speed * JUMP_HORIZONTAL_SPEED
     self.jumping = [False, None]
     self.step_id = 0
     self.done = False
+    self._status = False, False
     self.floor_height = floor_height
     self.two_obstacles = two_obstacles
-    if two_obstacles:
-      return self.get_state()
-
-    if obstacle_position < self.min_x_position or obstacle_position >= self.max_x_position:
-      raise ValueError('The obstacle x position needs to be in the range [{}, {}]'.format(self.min_x_position, self.max_x_position))
-    if floor_height < self.min_y_position or floor_height >= self.max_y_position:
-      raise ValueError('The floor height needs to be in the range [{}, {}]'.format(self.min_y_position, self.max_y_position))
-    self.obstacle_position = obstacle_position
-    return self.get_state()
+    if not two_obstacles:
+      if obstacle_position < self.min_x_position or obstacle_position >= self.max_x_position:
+        raise ValueError('The obstacle x position needs to be in the range [{}, {}]'.format(self.min_x_position, self.max_x_position))
+      if floor_height < self.min_y_position or floor_height >= self.max_y_position:
+        raise ValueError('The floor height needs to be in the range [{}, {}]'.format(self.min_y_position, self.max_y_position))
+      self.obstacle_position = obstacle_position
+    self._draw_background()
+    if self.rendering:
+      obstacles = [OBSTACLE_1, OBSTACLE_2] if two_obstacles else [self.obstacle_position]
+      top = self.zoom*(self.scr_h-self.floor_height-self.obstacle_h)
+      self._obstacle_screen_positions = [(self.zoom*left, top) for left in obstacles]
+    return self.get_state() if return_obs else None
 
 
   def close(self):
@@ -257,38 +342,68 @@ class JumpTaskEnv(gym.Env):
     self.np_random, seed = seeding.np_random(seed)
     return [seed]
 
-  def get_state(self):
-    """Returns an np array of the screen in greyscale
+  def _rect(self, left, bottom, width, height):
+    """Returns the (top, bottom, left, right) indices of the screen covered by
+    a rectangle given in game coordinates, i.e. with y the height above the
+    screen bottom. In greyscale, row i of the screen shows the pixels at
+    height i.
     """
-    obs = np.zeros((self.scr_h, self.scr_w), dtype=np.float32)
+    return (bottom, bottom + height, left, left + width)
 
-    def _fill_rec(left, up, size, color):
-      obs[left: left + size[0], up: up + size[1]] = color
+  def _fill_obstacle(self, obs, left):
+    """Draws an obstacle standing on the floor at x position `left`."""
+    top, bottom, left, right = self._rect(
+        left, self.floor_height, self.obstacle_w, self.obstacle_h)
+    obs[top:bottom, left:right] = GREYSCALE_GREY
 
-    # Add agent and obstacles
-    _fill_rec(self.agent_pos_x, self.agent_pos_y, self.agent_size, 1.0)
+  def _draw_scene(self, obs):
+    """Draws the obstacles, the outline of the screen and the floor in obs."""
     if self.two_obstacles:
       # Multiple obstacles
-      _fill_rec(OBSTACLE_1, self.floor_height,
-                self.obstacle_size, GREYSCALE_GREY)
-      _fill_rec(OBSTACLE_2, self.floor_height,
-                self.obstacle_size, GREYSCALE_GREY)
+      self._fill_obstacle(obs, OBSTACLE_1)
+      self._fill_obstacle(obs, OBSTACLE_2)
     else:
-      _fill_rec(self.obstacle_position, self.floor_height,
-                self.obstacle_size, GREYSCALE_GREY)
+      self._fill_obstacle(obs, self.obstacle_position)
 
-    # Draw the outline of the screen
-    obs[0:self.scr_w, 0] = GREYSCALE_WHITE
-    obs[0:self.scr_w, self.scr_h-1] = GREYSCALE_WHITE
-    obs[0, 0:self.scr_h] = GREYSCALE_WHITE
-    obs[self.scr_w-1, 0:self.scr_h] = GREYSCALE_WHITE
+    # Draw the outline of the screen: first and last rows, then columns
+    obs[::self.scr_h-1] = GREYSCALE_WHITE
+    obs[:, ::self.scr_w-1] = GREYSCALE_WHITE
 
     # Draw the floor
-    obs[0:self.scr_w, self.floor_height] = GREYSCALE_WHITE
+    top, bottom, _, _ = self._rect(0, self.floor_height, self.scr_w, 1)
+    obs[top:bottom, :] = GREYSCALE_WHITE
+
+  def _draw_background(self):
+    """Draws the static part of the screen, once per episode.
+    The agent is hidden behind the obstacles and the floor, so the foreground
+    is the same scene drawn on top of a screen filled with the agent color.
+    """
+    self._obs_background.fill(0)
+    self._draw_scene(self._obs_background)
+    self._obs_foreground.fill(GREYSCALE_WHITE)
+    self._draw_scene(self._obs_foreground)
+    np.copyto(self._obs_buffer, self._obs_background)
+    self._agent_rect = (0, 0, 0, 0)
+
+  def _draw_obs(self):
+    """Updates the observation buffer and returns it.
+    Only the agent moves during an episode: the pixels under its previous
+    position are restored from the background before drawing it again.
+    """
+    agent = self._rect(
+        self.agent_pos_x, self.agent_pos_y, self.agent_w, self.agent_h)
+    if agent != self._agent_rect:
+      self._move_rect(self._obs_buffer, self._obs_background,
+                      self._obs_foreground, self._agent_rect, agent)
+      self._agent_rect = agent
+    return self._obs_buffer
 
-    return obs.T
+  def get_state(self):
+    """Returns an np array of the screen in greyscale, as uint8 in [0, 255]
+    """
+    return self._draw_obs().copy()
 
-  def step(self, action):
+  def step(self, action, return_obs=True):
     """Updates the game state based on the action selected.
     Returns the state as a greyscale numpy array, the reward obtained by the agent
     and a boolean stating whether the next state is terminal.
@@ -296,12 +411,14 @@ class JumpTaskEnv(gym.Env):
 
     Args
       action: the action to be taken by the agent
+      return_obs: if False, the state is not computed and None is returned in
+        its place, by default True
     """
-    reward = -self.agent_pos_x
+    old_x = self.agent_pos_x
     if self.step_id > self.max_number_of_steps:
       print('You have reached the maximum number of steps.')
       self.done = True
-      return self.get_state(), 0., self.done, {}
+      return self.get_state() if return_obs else None, 0, self.done, {}
     elif action not in self.legal_actions:
       raise ValueError(
           'We did not recognize that action. '
@@ -322,20 +439,23 @@ class JumpTaskEnv(gym.Env):
         self.agent_current_speed = 0
 
     killed, exited = self._game_status()
+    self._render_step()
     if self.finish_jump:
       # Continue jumping until jump is finished
       # Being in the air is marked by self.jumping[0]
       while self.jumping[0] and not killed and not exited:
         self._continue_jump()
         killed, exited = self._game_status()
+        self._render_step()
 
-    reward += self.agent_pos_x
+    reward = self.agent_pos_x - old_x
     if killed:
       reward = self.rewards['life']
     elif exited:
       reward += self.rewards['exit']
     self.step_id += 1
-    return self.get_state(), reward, self.done, {'collision': killed}
+    state = self.get_state() if return_obs else None
+    return state, reward, self.done, {'collision': killed}
 
   def render(self):
     """Render the screen game using pygame.
@@ -348,29 +468,12 @@ class JumpTaskEnv(gym.Env):
     pygame.draw.line(self.screen, RGB_WHITE,
                     [0, self.zoom*(self.scr_h-self.floor_height)],
                     [self.zoom*self.scr_w, self.zoom*(self.scr_h-self.floor_height)], 1)
-    agent = pygame.Rect(self.zoom*self.agent_pos_x,
-                        self.zoom*(self.scr_h-self.agent_pos_y-self.agent_size[1]),
-                        self.zoom*self.agent_size[0],
-                        self.zoom*self.agent_size[1])
-    pygame.draw.rect(self.screen, RGB_WHITE, agent)
-
-    if self.two_obstacles:
-      obstacle = pygame.Rect(self.zoom*OBSTACLE_1,
-                             self.zoom*(self.scr_h-self.floor_height-self.obstacle_size[1]),
-                             self.zoom*self.obstacle_size[0],
-                             self.zoom*self.obstacle_size[1])
-      pygame.draw.rect(self.screen, RGB_GREY, obstacle)
-      obstacle = pygame.Rect(self.zoom*OBSTACLE_2,
-                             self.zoom*(self.scr_h-self.floor_height-self.obstacle_size[1]),
-                             self.zoom*self.obstacle_size[0],
-                             self.zoom*self.obstacle_size[1])
-    else:
-      obstacle = pygame.Rect(self.zoom*self.obstacle_position,
-                             self.zoom*(self.scr_h-self.obstacle_size[1]-self.floor_height),
-                             self.zoom*self.obstacle_size[0],
-                             self.zoom*self.obstacle_size[1])
-
-    pygame.draw.rect(self.screen, RGB_GREY, obstacle)
+    self._agent_screen_rect.topleft = (
+        self.zoom*self.agent_pos_x,
+        self.zoom*(self.scr_h-self.agent_pos_y-self.agent_h))
+    self.screen.fill(RGB_WHITE, self._agent_screen_rect)
+    for position in self._obstacle_screen_positions:
+      self.screen.blit(self._obstacle_surf, position)
 
     pygame.display.flip()
 
@@ -27,6 +27,9 @@
 import gym
 from gym_jumping_task import COLORS
 from gym_jumping_task import registry
+from gym_jumping_task.envs import BatchedJumpTaskEnv
+from gym_jumping_task.envs import JumpTaskEnv
+from gym_jumping_task.envs import JumpTaskEnvWithColors
 import numpy as np
 import pytest
 
@@ -93,3 +96,151 @@ def test_colored_env():
         break
     assert rewards >= env.rewards['collision']
     env.close()
+
+
+def test_batched_env():
+  """Check that a batch of envs behaves like the corresponding single envs."""
+  num_envs = 8
+  batched_env = BatchedJumpTaskEnv(num_envs=num_envs, seed=0)
+  obs = batched_env.reset()
+  envs = [JumpTaskEnv() for _ in range(num_envs)]
+
+  def _reset(i):
+    return envs[i]._reset(
+        obstacle_position=int(batched_env.obstacle_position[i]),
+        floor_height=int(batched_env.floor_height[i]))
+
+  for i in range(num_envs):
+    np.testing.assert_array_equal(obs[i], _reset(i))
+  rng = np.random.RandomState(0)
+  for _ in range(200):
+    actions = rng.randint(2, size=num_envs)
+    obs, rewards, dones, infos = batched_env.step(actions)
+    for i, env in enumerate(envs):
+      ob, reward, done, info = env.step(actions[i])
+      assert reward == rewards[i]
+      assert done == dones[i]
+      assert info['collision'] == infos['collision'][i]
+      assert not infos['timeout'][i]
+      if done:
+        np.testing.assert_array_equal(infos['terminal_observation'][i], ob)
+        ob = _reset(i)
+      np.testing.assert_array_equal(obs[i], ob)
+  batched_env.close()
+
+
+def test_batched_env_timeout():
+  """Check that the batched envs flag the episodes ended by a timeout."""
+  num_envs = 2
+  batched_env = BatchedJumpTaskEnv(num_envs=num_envs, max_number_of_steps=2)
+  batched_env.reset()
+  envs = [JumpTaskEnv(max_number_of_steps=2) for _ in range(num_envs)]
+  for i, env in enumerate(envs):
+    env._reset(obstacle_position=int(batched_env.obstacle_position[i]),
+               floor_height=int(batched_env.floor_height[i]))
+  # Jump just before the timeout so that it happens with the agent in the air
+  for action in [0, 0, 1, 1]:
+    _, rewards, dones, infos = batched_env.step(np.full(num_envs, action))
+    for i, env in enumerate(envs):
+      ob, reward, done, _ = env.step(action)
+      assert reward == rewards[i]
+      assert done == dones[i]
+  assert dones.all() and infos['timeout'].all()
+  assert not infos['collision'].any()
+  for i, env in enumerate(envs):
+    np.testing.assert_array_equal(infos['terminal_observation'][i],
+                                  env.get_state())
+  batched_env.close()
+
+
+def test_step_without_obs():
+  """Check that skipping observations does not affect the next ones."""
+  env, lazy_env = JumpTaskEnv(), JumpTaskEnv()
+  env.reset()
+  lazy_env.reset()
+  for action in [0, 0, 1, 0, 0, 0, 0, 0]:
+    ob, reward, done, _ = env.step(action)
+    lazy_ob, lazy_reward, lazy_done, _ = lazy_env.step(action, return_obs=False)
+    assert lazy_ob is None
+    assert (reward, done) == (lazy_reward, lazy_done)
+  np.testing.assert_array_equal(ob, lazy_env.get_state())
+
+
+def test_jax_env():
+  """Check that the JAX game behaves like JumpTaskEnv."""
+  jax = pytest.importorskip('jax')
+  from gym_jumping_task.envs import jax_jumping_task  # pylint: disable=g-import-not-at-top
+
+  env = JumpTaskEnv()
+  key = jax.random.PRNGKey(0)
+  rng = np.random.RandomState(0)
+  for _ in range(4):
+    key, reset_key = jax.random.split(key)
+    state, obs = jax_jumping_task.reset(reset_key)
+    ob = env._reset(obstacle_position=int(state.obstacle_x),
+                    floor_height=int(state.floor_height))
+    np.testing.assert_array_equal(obs, ob)
+    done = False
+    while not done:
+      action = rng.randint(2)
+      state, obs, reward, jax_done = jax_jumping_task.step(state, action)
+      ob, r, done, _ = env.step(action)
+      assert (r, done) == (int(reward), bool(jax_done))
+      np.testing.assert_array_equal(obs, ob)
+
+  num_envs, num_steps = 8, 50
+  keys = jax.random.split(key, num_envs)
+  states, _ = jax.vmap(jax_jumping_task.reset)(keys)
+  actions = rng.randint(2, size=(num_envs, num_steps))
+  _, (obs, rewards, dones) = jax.vmap(jax_jumping_task.rollout)(
+      states, actions, keys)
+  assert obs.shape == (num_envs, num_steps, 60, 60)
+  assert rewards.shape == dones.shape == (num_envs, num_steps)
+
+
+def test_greyscale_pixels():
+  """Check the pixels of the greyscale screen, which has the floor on top."""
+  env = JumpTaskEnv()
+  ob = env._reset(obstacle_position=30, floor_height=10)
+
+  def _expected(agent_x):
+    expected = np.zeros((60, 60), dtype=np.uint8)
+    expected[10:20, agent_x:agent_x + 5] = 255  # agent
+    expected[10:20, 30:39] = 128  # obstacle, drawn over the agent
+    expected[[0, 59], :] = 255  # outline
+    expected[:, [0, 59]] = 255
+    expected[10, :] = 255  # floor, drawn over everything
+    return expected
+
+  assert ob.dtype == np.uint8
+  np.testing.assert_array_equal(ob, _expected(0))
+  # Walk into the obstacle
+  for _ in range(26):
+    ob, _, done, _ = env.step(0)
+  assert done
+  np.testing.assert_array_equal(ob, _expected(26))
+
+
+def test_colors_pixels():
+  """Check the pixels of the RGB screen, which has the floor at the bottom."""
+  for color in COLORS:
+    env = JumpTaskEnvWithColors(obstacle_color=color)
+    ob = env._reset(obstacle_position=30, floor_height=10)
+
+    def _expected(agent_x):
+      expected = np.zeros((60, 60, 3), dtype=np.uint8)
+      expected[40:50, agent_x:agent_x + 5] = 255  # agent
+      expected[40:50, 30:39] = 0  # obstacle, drawn over the agent
+      expected[40:50, 30:39, color.value] = 128  # pylint: disable=cell-var-from-loop
+      expected[[0, 59]] = 255  # outline
+      expected[:, [0, 59]] = 255
+      expected[49] = 255  # floor, drawn over everything
+      return expected
+
+    assert ob.dtype == np.uint8
+    np.testing.assert_array_equal(ob, _expected(0))
+    # Walk into the obstacle, which only ends the game when it is red
+    for _ in range(26):
+      ob, _, done, _ = env.step(0)
+    assert done == (color == COLORS.RED)
+    np.testing.assert_array_equal(ob, _expected(26))